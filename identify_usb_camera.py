@@ -3,69 +3,175 @@
 Identify which camera is your USB camera
 Shows both cameras side by side
 """
+import threading
+
 import cv2
 import numpy as np
 
+from src.camera_utils import (
+    draw_label,
+    get_available_cameras,
+    grab_into,
+    make_label,
+    open_camera,
+)
+
+# Small frames don't benefit from a big OpenCV pool; keep it from competing with capture
+cv2.setNumThreads(2)
+
+VIEW_W, VIEW_H = 640, 480
+WINDOW_NAME = "Cameras"
+_Q = ord('q')
+
+
+def fit_into(frame, dst):
+    """Write frame into dst, resizing only when the sizes differ"""
+    h, w = dst.shape[:2]
+    if frame.shape[:2] == (h, w):
+        np.copyto(dst, frame)
+        return
+    # INTER_AREA is both faster and cleaner for downscaling
+    interp = cv2.INTER_AREA if frame.shape[1] > w else cv2.INTER_LINEAR
+    cv2.resize(frame, (w, h), dst=dst, interpolation=interp)
+
+
+class CamWorker(threading.Thread):
+    """
+    Reads one camera continuously and keeps only the latest frame.
+    Each new frame bumps seq and notifies new_frame, which is shared between workers.
+    
+    Frames are decoded into two reused buffers: the worker fills the back buffer,
+    then swaps it with self.frame under the lock. Readers must copy self.frame
+    out while holding new_frame.
+    """
+    
+    def __init__(self, cap, stop_event, new_frame):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.stop_event = stop_event
+        self.new_frame = new_frame
+        self.frame = None
+        self.seq = 0
+        self.failed = False
+    
+    def run(self):
+        back = None
+        while not self.stop_event.is_set():
+            ret, back = grab_into(self.cap, back)
+            with self.new_frame:
+                if ret:
+                    self.frame, back = back, self.frame
+                    self.seq += 1
+                else:
+                    self.failed = True
+                self.new_frame.notify_all()
+            if not ret:
+                break
+
+
 def main():
     print("🎥 Camera Identification Tool")
     print("=" * 50)
     
-    # Open both cameras
-    cap0 = cv2.VideoCapture(0)
-    cap1 = cv2.VideoCapture(2)
-    
-    if not cap0.isOpened():
-        print("❌ Camera 0 not available")
+    available = get_available_cameras()
+    if len(available) < 2:
+        print(f"❌ Need two cameras, found {len(available)}: {available}")
         return
+    idx0, idx1 = available[0], available[1]
     
-    if not cap1.isOpened():
-        print("❌ Camera 1 not available")
+    # Open both cameras; asking for the display size up front
+    # usually makes resizing unnecessary
+    try:
+        cap0 = open_camera(idx0, width=VIEW_W, height=VIEW_H)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+    try:
+        cap1 = open_camera(idx1, width=VIEW_W, height=VIEW_H)
+    except RuntimeError as e:
+        print(f"❌ {e}")
         cap0.release()
         return
     
     print("✅ Both cameras opened successfully")
     print("\n📌 Instructions:")
-    print("   - LEFT window = Camera 0")
-    print("   - RIGHT window = Camera 1")
+    print(f"   - One '{WINDOW_NAME}' window shows both feeds side by side")
+    print(f"   - LEFT half = Camera {idx0}")
+    print(f"   - RIGHT half = Camera {idx1}")
     print("   - Identify which one is your USB camera")
-    print("   - Press 'q' to quit")
+    print("   - Press 'q' in the window to quit")
     print("\nShowing both cameras now...\n")
     
+    # Capture runs on its own threads so display never stalls the cameras.
+    # Display stays on the main thread (HighGUI requires it on macOS/Windows)
+    # and sleeps until a worker publishes a frame instead of redrawing old ones.
+    stop_event = threading.Event()
+    new_frame = threading.Condition()
+    w0 = CamWorker(cap0, stop_event, new_frame)
+    w1 = CamWorker(cap1, stop_event, new_frame)
+    w0.start()
+    w1.start()
+    
+    # One side-by-side canvas reused every frame
+    canvas = np.empty((VIEW_H, VIEW_W * 2, 3), np.uint8)
+    
+    # Create the single window up front so 'q' works while the cameras warm up
+    cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_AUTOSIZE)
+    
+    # Labels never change, so rasterize them once up front
+    # Hard-edged, like the original putText labels, so drawing is a masked copy
+    label0 = make_label(f"CAMERA {idx0}", (0, 255, 0), scale=1.5, thickness=3, antialias=False)
+    label1 = make_label(f"CAMERA {idx1}", (0, 0, 255), scale=1.5, thickness=3, antialias=False)
+    
+    shown = (0, 0)
+    
     while True:
-        ret0, frame0 = cap0.read()
-        ret1, frame1 = cap1.read()
+        with new_frame:
+            new_frame.wait_for(
+                lambda: (w0.seq, w1.seq) != shown or w0.failed or w1.failed,
+                timeout=0.1,
+            )
+            failed = w0.failed or w1.failed
+            seqs = (w0.seq, w1.seq)
+            ready = seqs != shown and w0.frame is not None and w1.frame is not None
+            if ready:
+                # Copy into each half of the canvas before the workers reuse their buffers
+                fit_into(w0.frame, canvas[:, :VIEW_W])
+                fit_into(w1.frame, canvas[:, VIEW_W:])
         
-        if not ret0 or not ret1:
+        if failed:
             print("❌ Failed to read from cameras")
             break
         
-        # Resize for display
-        frame0 = cv2.resize(frame0, (640, 480))
-        frame1 = cv2.resize(frame1, (640, 480))
+        if not ready:
+            # Nothing new yet (or cameras still warming up); keep the GUI responsive
+            if (cv2.waitKey(1) & 0xFF) == _Q:
+                break
+            continue
+        shown = seqs
         
         # Add labels
-        cv2.putText(frame0, "CAMERA 0", (10, 40), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
-        cv2.putText(frame1, "CAMERA 1", (10, 40), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 255), 3)
+        draw_label(canvas, label0, (10, 40))
+        draw_label(canvas, label1, (VIEW_W + 10, 40))
         
-        # Show both
-        cv2.imshow("Camera 0 (LEFT)", frame0)
-        cv2.imshow("Camera 1 (RIGHT)", frame1)
+        # Show both in one window: a single HighGUI upload per frame
+        cv2.imshow(WINDOW_NAME, canvas)
         
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
+        if (cv2.waitKey(1) & 0xFF) == _Q:
             break
     
+    stop_event.set()
+    w0.join()
+    w1.join()
     cap0.release()
     cap1.release()
-    cv2.destroyAllWindows()
+    cv2.destroyWindow(WINDOW_NAME)
     
     print("\n" + "=" * 50)
     print("Which camera is your USB camera?")
-    choice = input("Enter 0 or 1: ").strip()
+    choice = input(f"Enter {idx0} or {idx1}: ").strip()
     
-    if choice in ['0', '1']:
+    if choice in [str(idx0), str(idx1)]:
         print(f"\n✅ You identified Camera {choice} as your USB camera")
         print(f"\n📝 To use this camera in your face locking system:")
         print(f"   Update camera index to {choice} in:")
@@ -1,8 +1,91 @@
 """
-Camera utility functions for automatic external camera detection
+Camera utility functions: automatic external camera detection, capture
+helpers, and pre-rendered text labels for drawing on frames
 """
-import cv2
-from typing import Optional, List, Tuple
+import sys
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, List, Tuple
+
+# cv2 is imported inside each function so importing this module stays cheap
+if TYPE_CHECKING:
+    import cv2
+    import numpy as np
+
+
+def _backend() -> int:
+    """Explicit platform backend, which skips OpenCV's slow backend auto-detection."""
+    import cv2
+    
+    if sys.platform.startswith("linux"):
+        return cv2.CAP_V4L2
+    if sys.platform == "win32":
+        return cv2.CAP_DSHOW
+    return cv2.CAP_AVFOUNDATION
+
+
+@dataclass(frozen=True)
+class CameraProbe:
+    """Result of probing one camera; backend is the cap.getBackendName() string (e.g. "V4L2")."""
+    index: int
+    width: int
+    height: int
+    backend: str
+
+
+@functools.lru_cache(maxsize=None)
+def _probe(index: int) -> Optional[CameraProbe]:
+    """
+    Open a camera once and capture its info, or None if it doesn't deliver frames.
+    Cached per index so the select_best_camera() fast path and full scans share results.
+    """
+    import cv2
+    
+    cap = cv2.VideoCapture(index, _backend())
+    try:
+        if not cap.isOpened():
+            return None
+        # grab() is enough proof-of-life; skip decoding a frame we'd discard
+        if not cap.grab():
+            return None
+        return CameraProbe(
+            index=index,
+            width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            backend=cap.getBackendName(),
+        )
+    finally:
+        cap.release()
+
+
+def probe_cameras(max_test: int = 5) -> Tuple[CameraProbe, ...]:
+    """
+    Test camera indices and return info for each working camera.
+    
+    Indices are probed in parallel since opening a missing device can
+    block for a few seconds. Each device is opened only once.
+    
+    Results are cached per index for the life of the process; call
+    clear_camera_cache() to rescan after plugging/unplugging a camera.
+    
+    Args:
+        max_test: Maximum number of camera indices to test
+        
+    Returns:
+        Tuple of CameraProbe sorted by index
+    """
+    if max_test <= 0:
+        return ()
+    
+    with ThreadPoolExecutor(max_workers=max_test) as ex:
+        results = list(ex.map(_probe, range(max_test)))
+    return tuple(sorted((p for p in results if p is not None), key=lambda p: p.index))
+
+
+def clear_camera_cache() -> None:
+    """Forget cached probe results so the next call rescans the devices."""
+    _probe.cache_clear()
 
 
 def get_available_cameras(max_test: int = 5) -> List[int]:
@@ -15,28 +98,25 @@ def get_available_cameras(max_test: int = 5) -> List[int]:
     Returns:
         List of working camera indices
     """
-    available = []
-    for i in range(max_test):
-        cap = cv2.VideoCapture(i)
-        if cap.isOpened():
-            ret, _ = cap.read()
-            if ret:
-                available.append(i)
-            cap.release()
-    return available
+    return [p.index for p in probe_cameras(max_test)]
 
 
 def get_camera_info(index: int) -> Optional[Tuple[int, int, str]]:
     """
     Get camera information (width, height, backend).
     
+    Kept as public API for callers that need info on a single index;
+    within this module, probe_cameras() collects the same data.
+    
     Args:
         index: Camera index
         
     Returns:
         Tuple of (width, height, backend_name) or None if camera not available
     """
-    cap = cv2.VideoCapture(index)
+    import cv2
+    
+    cap = cv2.VideoCapture(index, _backend())
     if not cap.isOpened():
         return None
     
@@ -53,6 +133,8 @@ def select_best_camera(prefer_external: bool = True) -> int:
     Automatically select the best camera.
     
     Strategy:
+    - If prefer_external=False and camera 0 works, use it without scanning the
+      other indices (same answer as a full scan, minus the extra device opens)
     - If prefer_external=True and multiple cameras found, prefer higher index (usually external USB)
     - If only one camera, use it
     - If no cameras, raise error
@@ -66,7 +148,12 @@ def select_best_camera(prefer_external: bool = True) -> int:
     Raises:
         RuntimeError: If no cameras are available
     """
-    available = get_available_cameras()
+    if not prefer_external and _probe(0) is not None:
+        print("📷 Using camera 0 (built-in camera)")
+        return 0
+    
+    probes = probe_cameras()
+    available = [p.index for p in probes]
     
     if not available:
         raise RuntimeError(
@@ -93,13 +180,25 @@ def select_best_camera(prefer_external: bool = True) -> int:
     return camera_idx
 
 
-def open_camera(camera_index: Optional[int] = None, prefer_external: bool = True) -> cv2.VideoCapture:
+def open_camera(
+    camera_index: Optional[int] = None,
+    prefer_external: bool = True,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    fourcc: Optional[str] = "MJPG",
+    fps: Optional[int] = 30,
+) -> "cv2.VideoCapture":
     """
     Open camera with automatic selection if index not specified.
     
     Args:
         camera_index: Specific camera index to use, or None for auto-selection
         prefer_external: If True and camera_index is None, prefer external cameras
+        width: Requested frame width, or None to keep the driver default
+        height: Requested frame height, or None to keep the driver default
+        fourcc: Requested pixel format (MJPG uses far less USB bandwidth than YUYV),
+            or None to keep the driver default
+        fps: Requested frame rate, or None to keep the driver default
         
     Returns:
         Opened VideoCapture object
@@ -107,10 +206,12 @@ def open_camera(camera_index: Optional[int] = None, prefer_external: bool = True
     Raises:
         RuntimeError: If camera cannot be opened
     """
+    import cv2
+    
     if camera_index is None:
         camera_index = select_best_camera(prefer_external=prefer_external)
     
-    cap = cv2.VideoCapture(camera_index)
+    cap = cv2.VideoCapture(camera_index, _backend())
     
     if not cap.isOpened():
         raise RuntimeError(
@@ -118,14 +219,128 @@ def open_camera(camera_index: Optional[int] = None, prefer_external: bool = True
             f"Available cameras: {get_available_cameras()}"
         )
     
-    info = get_camera_info(camera_index)
-    if info:
-        width, height, backend = info
-        print(f"✅ Camera {camera_index} opened: {width}x{height} ({backend})")
+    # Keep only the newest frame queued so read() doesn't return stale frames
+    # (some backends ignore this, which is fine)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    
+    # Negotiate format before size: some drivers only offer high resolutions under MJPG
+    if fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    if width:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    if height:
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if fps:
+        cap.set(cv2.CAP_PROP_FPS, fps)
+    
+    # Read back what the driver actually accepted from the capture we already hold
+    actual_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    actual_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    actual_fps = cap.get(cv2.CAP_PROP_FPS)
+    code = int(cap.get(cv2.CAP_PROP_FOURCC))
+    actual_fourcc = "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00")
+    backend = cap.getBackendName()
+    print(
+        f"✅ Camera {camera_index} opened: {actual_w}x{actual_h} "
+        f"@ {actual_fps:.0f}fps {actual_fourcc or '?'} ({backend})"
+    )
+    
+    if (width and actual_w != width) or (height and actual_h != height):
+        print(f"⚠️ Requested {width}x{height}, camera is using {actual_w}x{actual_h}")
     
     return cap
 
 
+def grab_into(
+    cap: "cv2.VideoCapture", buf: Optional["np.ndarray"] = None
+) -> Tuple[bool, Optional["np.ndarray"]]:
+    """
+    Grab the next frame and decode it into buf, like cap.read() without
+    allocating a new array every frame.
+    
+    Args:
+        cap: Opened VideoCapture
+        buf: Buffer to decode into; reused when its shape matches the frame,
+            otherwise (or if None) OpenCV allocates a new one
+        
+    Returns:
+        Tuple of (success, frame). Pass frame back in as buf on the next call.
+    """
+    if not cap.grab():
+        return False, buf
+    ret, frame = cap.retrieve(buf)
+    return ret, frame if ret else buf
+
+
+@dataclass(frozen=True)
+class TextLabel:
+    """Text rasterized once by make_label(), ready for draw_label() to blend onto frames."""
+    premul: "np.ndarray"     # (h,w,3) uint8, round(color * alpha)
+    inv_alpha: "np.ndarray"  # (h,w,3) uint8, 255 * (1 - alpha)
+    origin: Tuple[int, int]  # text origin (bottom-left of baseline) inside the sprite
+    mask: Optional["np.ndarray"] = None  # (h,w) uint8 drawn-pixel mask, hard-edged labels only
+
+
+def make_label(
+    text: str,
+    color: Tuple[int, int, int],
+    scale: float = 1.0,
+    thickness: int = 2,
+    antialias: bool = True,
+) -> TextLabel:
+    """
+    Rasterize static text once so it can be blended onto frames with
+    draw_label() instead of calling cv2.putText every frame.
+    
+    With antialias=False the text has hard edges (like putText's default
+    LINE_8) and draw_label() can use a plain masked copy instead of blending.
+    """
+    import cv2
+    import numpy as np
+    
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    (w, h), baseline = cv2.getTextSize(text, font, scale, thickness)
+    pad = thickness
+    origin = (pad, h + pad)
+    
+    # Render white-on-black with anti-aliasing; the intensity is the alpha
+    alpha = np.zeros((h + baseline + 2 * pad, w + 2 * pad), np.uint8)
+    line_type = cv2.LINE_AA if antialias else cv2.LINE_8
+    cv2.putText(alpha, text, origin, font, scale, 255, thickness, line_type)
+    mask = None if antialias else alpha.copy()
+    alpha = np.repeat(alpha[:, :, None], 3, axis=2)
+    
+    # +0.5 rounds the premultiplied color to nearest when cast to uint8
+    premul = (alpha.astype(np.float32) * (np.asarray(color, np.float32) / 255.0) + 0.5).astype(np.uint8)
+    return TextLabel(premul=premul, inv_alpha=255 - alpha, origin=origin, mask=mask)
+
+
+def draw_label(img: "np.ndarray", label: TextLabel, org: Tuple[int, int]) -> None:
+    """Blend a pre-rendered label onto img in place, with its text origin at org like cv2.putText."""
+    import cv2
+    
+    x = org[0] - label.origin[0]
+    y = org[1] - label.origin[1]
+    h, w = label.inv_alpha.shape[:2]
+    
+    # Clip to the image so labels near the edge don't break the blend
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, img.shape[1]), min(y + h, img.shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return
+    ls = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+    
+    region = img[y0:y1, x0:x1]
+    if label.mask is not None:
+        # Hard-edged text: copy the drawn pixels straight in
+        cv2.copyTo(label.premul[ls], label.mask[ls], region)
+        return
+    
+    # region * (1 - alpha) + color * alpha, in place on uint8 with no temporaries
+    cv2.multiply(region, label.inv_alpha[ls], dst=region, scale=1 / 255.0)
+    cv2.add(region, label.premul[ls], dst=region)
+
+
 def list_cameras_interactive() -> int:
     """
     Show user all available cameras and let them choose.
@@ -133,7 +348,8 @@ def list_cameras_interactive() -> int:
     Returns:
         Selected camera index
     """
-    available = get_available_cameras()
+    probes = probe_cameras()
+    available = [p.index for p in probes]
     
     if not available:
         raise RuntimeError("No cameras detected!")
@@ -141,13 +357,8 @@ def list_cameras_interactive() -> int:
     print("\n📷 Available Cameras:")
     print("=" * 50)
     
-    for idx in available:
-        info = get_camera_info(idx)
-        if info:
-            width, height, backend = info
-            print(f"  Camera {idx}: {width}x{height} ({backend})")
-        else:
-            print(f"  Camera {idx}: Available")
+    for p in probes:
+        print(f"  Camera {p.index}: {p.width}x{p.height} ({p.backend})")
     
     print("=" * 50)
     
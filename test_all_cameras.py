@@ -1,74 +1,113 @@
 #!/usr/bin/env python3
 """
 Test all available camera indices to find your USB camera
+
+Usage:
+    python test_all_cameras.py            # scan + measure capture FPS
+    python test_all_cameras.py --preview  # also show a live preview per camera
 """
+import argparse
+import time
+
 import cv2
 
-def test_camera(index):
-    """Test if a camera at given index works"""
-    cap = cv2.VideoCapture(index)
-    if cap.isOpened():
+from src.camera_utils import draw_label, make_label, open_camera, probe_cameras
+
+# Small frames don't benefit from a big OpenCV pool; keep it from competing with capture
+cv2.setNumThreads(2)
+
+FPS_TEST_FRAMES = 60
+_Q = ord('q')
+
+def measure_fps(cap, n_frames=FPS_TEST_FRAMES):
+    """Measure capture rate with grab() only, so decoding/display don't skew the timing"""
+    # First grab includes stream start-up; keep it out of the measurement
+    if not cap.grab():
+        return None
+    
+    t0 = time.perf_counter()
+    for _ in range(n_frames):
+        if not cap.grab():
+            return None
+    dt = time.perf_counter() - t0
+    return n_frames / dt if dt > 0 else None
+
+def preview_camera(idx, cap, hint):
+    """Show a live preview until a key is pressed; returns the key code"""
+    print(f"Showing Camera {idx} - Press any key for next camera...")
+    title = make_label(f"Camera Index: {idx}", (0, 255, 0))
+    key = 255
+    
+    while True:
         ret, frame = cap.read()
-        if ret:
-            print(f"✅ Camera {index}: Working - Resolution: {frame.shape[1]}x{frame.shape[0]}")
-            cap.release()
-            return True
-        else:
-            print(f"⚠️ Camera {index}: Opened but can't read frames")
-            cap.release()
-            return False
-    else:
-        print(f"❌ Camera {index}: Not available")
-        return False
+        if not ret:
+            print(f"Failed to read from camera {idx}")
+            break
+        
+        # Add text overlay
+        draw_label(frame, title, (10, 30))
+        draw_label(frame, hint, (10, 70))
+        
+        cv2.imshow(f"Camera Test - Index {idx}", frame)
+        
+        key = cv2.waitKey(1) & 0xFF
+        if key != 255:  # Any key pressed
+            break
+    
+    cv2.destroyAllWindows()
+    return key
 
-def main():
+def main(preview=False):
     print("🔍 Scanning for available cameras...\n")
     
-    available_cameras = []
-    
     # Test indices 0-5 (covers most systems)
-    for i in range(6):
-        if test_camera(i):
-            available_cameras.append(i)
+    probes = probe_cameras(max_test=6)
+    for p in probes:
+        print(f"✅ Camera {p.index}: Working - Resolution: {p.width}x{p.height}")
+    available_cameras = [p.index for p in probes]
     
     print(f"\n📊 Summary:")
     print(f"Found {len(available_cameras)} working camera(s): {available_cameras}")
     
-    if len(available_cameras) > 0:
-        print("\n🎥 Testing each camera with live preview...")
+    if len(available_cameras) == 0:
+        print("\n❌ No working cameras found!")
+        return
+    
+    print(f"\n⏱️ Measuring capture rate ({FPS_TEST_FRAMES} frames each)"
+          + (", then live preview" if preview else "") + "...")
+    if preview:
         print("Press any key to move to next camera, 'q' to quit\n")
+        # The hint text is the same for every camera, so rasterize it once
+        hint = make_label("Press any key for next, 'q' to quit", (255, 255, 255),
+                          scale=0.6, thickness=1)
+    
+    # One camera at a time: the same capture serves the FPS test and the preview,
+    # and is released before the next so streams don't compete for USB bandwidth.
+    # (The scan above uses its own short-lived capture per device.)
+    for idx in available_cameras:
+        try:
+            # Same backend, buffer size and MJPG format the scan and other scripts use
+            cap = open_camera(idx, fps=None)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            continue
         
-        for idx in available_cameras:
-            cap = cv2.VideoCapture(idx)
-            if cap.isOpened():
-                print(f"Showing Camera {idx} - Press any key for next camera...")
-                
-                while True:
-                    ret, frame = cap.read()
-                    if ret:
-                        # Add text overlay
-                        cv2.putText(frame, f"Camera Index: {idx}", (10, 30), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                        cv2.putText(frame, "Press any key for next, 'q' to quit", (10, 70), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-                        
-                        cv2.imshow(f"Camera Test - Index {idx}", frame)
-                        
-                        key = cv2.waitKey(1) & 0xFF
-                        if key != 255:  # Any key pressed
-                            break
-                    else:
-                        print(f"Failed to read from camera {idx}")
-                        break
-                
-                cap.release()
-                cv2.destroyAllWindows()
-                
-                if key == ord('q'):
-                    print("Quit by user")
-                    break
-    else:
-        print("\n❌ No working cameras found!")
+        try:
+            fps = measure_fps(cap)
+            if fps is None:
+                print(f"  Camera {idx}: failed to grab frames")
+            else:
+                print(f"  Camera {idx}: {fps:.1f} fps")
+            
+            if preview and preview_camera(idx, cap, hint) == _Q:
+                print("Quit by user")
+                break
+        finally:
+            cap.release()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Find and test available cameras")
+    parser.add_argument("--preview", action="store_true",
+                        help="show a live preview of each camera after the scan")
+    args = parser.parse_args()
+    main(preview=args.preview)